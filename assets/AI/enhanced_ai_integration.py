@@ -5,10 +5,13 @@ Enhanced Trix AI Integration for Human-Enhanced Model
 Integration script for the human-enhanced PPO model trained with supervised learning.
 """
 
+import copy
+import functools
 import json
 import torch
 import numpy as np
 import os
+import random
 import sys
 from typing import List, Dict, Any, Optional, Tuple
 
@@ -20,6 +23,31 @@ except ImportError:
     STABLE_BASELINES_AVAILABLE = False
     print("⚠️ stable_baselines3 not available, using fallback mode")
 
+@functools.lru_cache(maxsize=8)
+def _read_config(abs_path: str) -> dict:
+    """Load and cache a JSON config file by absolute path (configs never change at runtime)"""
+    with open(abs_path, 'r') as f:
+        return json.load(f)
+
+def _load_config(path: str) -> dict:
+    """Return a private copy of a cached config; relative paths resolve against the current directory"""
+    return copy.deepcopy(_read_config(os.path.abspath(path)))
+
+# Added to the scores of illegal actions so argmax/softmax never pick them
+MASK_PENALTY = -1e9
+
+# Card encoding lookup tables (built once, shared by every conversion)
+_SUITS = {'hearts': 0, 'diamonds': 1, 'clubs': 2, 'spades': 3}
+_RANKS = {
+    'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
+    'eight': 8, 'nine': 9, 'ten': 10, 'jack': 11, 'queen': 12, 'king': 13, 'ace': 14
+}
+_CARD_CODES = {
+    (suit, rank): suit_value * 13 + (rank_value - 2)
+    for suit, suit_value in _SUITS.items()
+    for rank, rank_value in _RANKS.items()
+}
+
 class EnhancedTrixAI:
     """Enhanced Trix AI using human-enhanced PPO model"""
     
@@ -33,8 +61,7 @@ class EnhancedTrixAI:
             config_path = "agent_config_enhanced.json"
         
         try:
-            with open(config_path, 'r') as f:
-                self.config = json.load(f)
+            self.config = _load_config(config_path)
             print(f"✅ Loaded enhanced configuration from {config_path}")
         except Exception as e:
             print(f"⚠️ Could not load config: {e}")
@@ -50,6 +77,13 @@ class EnhancedTrixAI:
         self.state_size = self.config['model_info']['state_size']
         self.action_size = self.config['model_info']['action_size']
         
+        # Reusable input buffers for predict_move (pinned when feeding a GPU)
+        pin_memory = self.device.type == 'cuda'
+        self._state_buf = torch.empty(1, self.state_size, dtype=torch.float32, pin_memory=pin_memory)
+        self._state_np = self._state_buf.numpy()  # zero-copy view for writes
+        # Additive legal-action mask: 0 for legal actions, MASK_PENALTY for illegal ones
+        self._mask_add_buf = torch.empty(self.action_size, dtype=torch.float32, device=self.device)
+        
         # Load the enhanced model
         if model_path is None:
             model_path = "policy.pth"
@@ -95,57 +129,71 @@ class EnhancedTrixAI:
         except Exception as e:
             print(f"❌ Failed to load PyTorch model: {e}")
     
-    def predict_move(self, game_state: List[float], legal_actions: List[int] = None) -> int:
+    def predict_move(self, game_state: np.ndarray, legal_actions: List[int] = None) -> int:
         """
         Predict the best move given the current game state
         
         Args:
-            game_state: 186-dimensional state vector
+            game_state: 186-dimensional float32 state vector, as returned by
+                convert_hand_to_state (plain lists are still accepted, but are
+                copied element by element)
             legal_actions: List of legal action indices (0-51)
             
         Returns:
             Best action index
         """
+        # Forced move (e.g. must follow suit): nothing to decide
+        if legal_actions is not None and len(legal_actions) == 1:
+            return legal_actions[0]
+        
         if not self.model_loaded:
             print("⚠️ Model not loaded, returning random action")
-            if legal_actions:
-                return np.random.choice(legal_actions)
-            return np.random.randint(0, self.action_size)
+            return self._random_action(legal_actions)
+        
+        # Without the policy network there's no signal to compute, so skip the forward pass
+        if not (STABLE_BASELINES_AVAILABLE and isinstance(self.model, dict)):
+            return self._random_action(legal_actions)
         
         try:
-            # Convert state to tensor
-            state_tensor = torch.FloatTensor(game_state).unsqueeze(0).to(self.device)
+            if isinstance(game_state, np.ndarray) and game_state.dtype == np.float32 and self.device.type == 'cpu':
+                # Zero-copy view of the state vector
+                state_tensor = torch.from_numpy(game_state).unsqueeze(0)
+            else:
+                # Write the state into the reusable input buffer
+                self._state_np[0, :] = game_state
+                state_tensor = self._state_buf.to(self.device, non_blocking=True)
             
             # Get prediction from model
             with torch.no_grad():
-                if STABLE_BASELINES_AVAILABLE and isinstance(self.model, dict):
-                    # Use the policy network from the checkpoint
-                    # This is a simplified version - you might need to adjust based on exact model structure
-                    action_probs = self._get_action_probabilities(state_tensor)
-                else:
-                    # Fallback prediction
-                    action_probs = torch.softmax(state_tensor @ torch.randn(self.state_size, self.action_size), dim=-1)
+                # Use the policy network from the checkpoint
+                # This is a simplified version - you might need to adjust based on exact model structure
+                action_probs = self._get_action_probabilities(state_tensor)
                 
-                # Apply legal actions mask if provided
+                # Apply legal actions mask if provided (argmax doesn't need renormalizing)
                 if legal_actions is not None:
-                    masked_probs = torch.zeros_like(action_probs)
-                    for action in legal_actions:
-                        if 0 <= action < self.action_size:
-                            masked_probs[0, action] = action_probs[0, action]
+                    actions = torch.as_tensor(legal_actions, dtype=torch.long)
+                    actions = actions[(actions >= 0) & (actions < self.action_size)]
                     
-                    if masked_probs.sum() > 0:
-                        action_probs = masked_probs / masked_probs.sum()
+                    if actions.numel() > 0:
+                        mask_additive = self._mask_add_buf
+                        mask_additive.fill_(MASK_PENALTY)
+                        mask_additive[actions] = 0.0
+                        action_probs = action_probs + mask_additive
                 
                 # Select best action
-                best_action = torch.argmax(action_probs, dim=-1).item()
+                best_action = int(action_probs.argmax())
                 
                 return best_action
                 
         except Exception as e:
             print(f"⚠️ Prediction error: {e}")
-            if legal_actions:
-                return np.random.choice(legal_actions)
-            return np.random.randint(0, self.action_size)
+            return self._random_action(legal_actions)
+    
+    def _random_action(self, legal_actions: List[int] = None) -> int:
+        """Pick a uniformly random action, restricted to legal actions if given"""
+        if legal_actions:
+            return random.choice(legal_actions)
+        return random.randrange(self.action_size)
     
     def _get_action_probabilities(self, state_tensor):
         """Get action probabilities from the enhanced model"""
@@ -171,26 +219,26 @@ class EnhancedTrixAI:
 # Helper functions for Flutter integration
 def convert_card_to_encoded_value(suit: str, rank: str) -> int:
     """Convert card suit and rank to encoded value (0-51)"""
-    suits = {'hearts': 0, 'diamonds': 1, 'clubs': 2, 'spades': 3}
-    ranks = {
-        'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7,
-        'eight': 8, 'nine': 9, 'ten': 10, 'jack': 11, 'queen': 12, 'king': 13, 'ace': 14
-    }
-    
-    suit_value = suits.get(suit.lower(), 0)
-    rank_value = ranks.get(rank.lower(), 2)
-    return suit_value * 13 + (rank_value - 2)
+    suit, rank = suit.lower(), rank.lower()
+    code = _CARD_CODES.get((suit, rank))
+    if code is None:
+        # Unknown names keep the historical defaults (hearts / two)
+        code = _SUITS.get(suit, 0) * 13 + (_RANKS.get(rank, 2) - 2)
+    return code
 
-def convert_hand_to_state(hand: List[Dict], game_context: Dict = None) -> List[float]:
-    """Convert hand and game context to 186-dimensional state vector"""
+def convert_hand_to_state(hand: List[Dict], game_context: Dict = None) -> np.ndarray:
+    """Convert hand and game context to 186-dimensional float32 state vector"""
     state = np.zeros(186, dtype=np.float32)
     
-    # Cards in hand (first 52 dimensions - one-hot encoding)
-    for card in hand:
-        if 'suit' in card and 'rank' in card:
-            encoded_val = convert_card_to_encoded_value(card['suit'], card['rank'])
-            if 0 <= encoded_val < 52:
-                state[encoded_val] = 1.0
+    # Cards in hand (first 52 dimensions - one-hot encoding), scattered in one go
+    cards = [card for card in hand if 'suit' in card and 'rank' in card]
+    if cards:
+        indices = np.fromiter(
+            (convert_card_to_encoded_value(card['suit'], card['rank']) for card in cards),
+            dtype=np.int64,
+            count=len(cards)
+        )
+        state[indices] = 1.0
     
     # Game context features (remaining dimensions)
     if game_context:
@@ -202,7 +250,7 @@ def convert_hand_to_state(hand: List[Dict], game_context: Dict = None) -> List[f
         if 'current_score' in game_context:
             state[54] = min(game_context['current_score'] / 100.0, 1.0)
     
-    return state.tolist()
+    return state
 
 # Test function
 def test_enhanced_ai():
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+ExecuTorch export for the deployed Trix AI agent.
+Run this offline to produce on-device artifacts for Flutter integration:
+
+- policy.pte: ExecuTorch program lowered to the XNNPACK backend
+- policy.ptl: PyTorch Mobile lite-interpreter model (secondary path)
+
+The Python inference path (python_inference_example.py) remains the
+fallback for desktop development.
+"""
+
+import os
+import sys
+
+import torch
+
+from python_inference_example import PPOAgent, _load_config
+
+def _load_policy(model_info: dict, model_path: str = None) -> torch.nn.Module:
+    """Load the eager policy network straight from the checkpoint state dict"""
+    agent = PPOAgent(
+        state_size=model_info['state_size'],
+        action_size=model_info['action_size'],
+        lr=0.0003,
+        device='cpu'
+    )
+    checkpoint = torch.load(model_path or "trix_agent_full.pt", map_location='cpu')
+    agent.policy.load_state_dict(checkpoint['policy_state_dict'])
+    return agent.policy.eval()
+
+def export_policy(model_path: str = None, output_dir: str = "."):
+    """Export the policy network to ExecuTorch (.pte) and lite-interpreter (.ptl) files"""
+    model_info = _load_config("agent_config.json")['model_info']
+    policy = _load_policy(model_info, model_path)
+
+    example_state = torch.zeros(1, model_info['state_size'])
+    example_mask = torch.ones(1, model_info['action_size'])
+
+    # 1. ExecuTorch program with XNNPACK-delegated Linear/activation kernels
+    try:
+        from executorch.exir import to_edge
+        from executorch.backends.xnnpack.partition.xnnpack_partitioner import XnnpackPartitioner
+
+        exported = torch.export.export(policy, (example_state, example_mask))
+        edge_program = to_edge(exported).to_backend(XnnpackPartitioner())
+
+        pte_path = os.path.join(output_dir, "policy.pte")
+        with open(pte_path, "wb") as f:
+            f.write(edge_program.to_executorch().buffer)
+        print(f"✓ ExecuTorch program saved to {pte_path}")
+    except ImportError as e:
+        print(f"⚠️ executorch not available, skipping .pte export: {e}")
+    except Exception as e:
+        # Export/lowering failures must not block the lite-interpreter fallback
+        print(f"⚠️ ExecuTorch export failed, skipping .pte export: {e}")
+
+    # 2. Lite-interpreter model for the PyTorch Mobile runtime
+    from torch.utils.mobile_optimizer import optimize_for_mobile
+
+    try:
+        scripted = torch.jit.script(policy)
+    except Exception:
+        scripted = torch.jit.trace(policy, (example_state, example_mask))
+
+    try:
+        scripted = optimize_for_mobile(scripted)
+    except Exception as e:
+        # e.g. torch builds without XNNPACK; the unoptimized module still runs
+        print(f"⚠️ optimize_for_mobile failed, saving unoptimized model: {e}")
+
+    ptl_path = os.path.join(output_dir, "policy.ptl")
+    scripted._save_for_lite_interpreter(ptl_path)
+    print(f"✓ Lite-interpreter model saved to {ptl_path}")
+
+if __name__ == "__main__":
+    export_policy(*sys.argv[1:3])
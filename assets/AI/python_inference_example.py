@@ -6,6 +6,8 @@ Use this to test the agent before Flutter integration.
 
 import torch
 import numpy as np
+import copy
+import functools
 import json
 import sys
 import os
@@ -16,13 +18,25 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from agents.ppo_agent import PPOAgent
 from trex_env import TrexEnv
 
+@functools.lru_cache(maxsize=8)
+def _read_config(abs_path: str) -> dict:
+    """Load and cache a JSON config file by absolute path (configs never change at runtime)"""
+    with open(abs_path, 'r') as f:
+        return json.load(f)
+
+def _load_config(path: str) -> dict:
+    """Return a private copy of a cached config; relative paths resolve against the current directory"""
+    return copy.deepcopy(_read_config(os.path.abspath(path)))
+
+# Added to the logits of illegal actions so argmax/softmax never pick them
+MASK_PENALTY = -1e9
+
 class TrixAIInference:
     """Simple inference wrapper for the Trix AI agent"""
     
-    def __init__(self, model_path: str = None):
+    def __init__(self, model_path: str = None, use_bf16: bool = False):
         # Load configuration
-        with open("agent_config.json", 'r') as f:
-            self.config = json.load(f)
+        self.config = _load_config("agent_config.json")
         
         self.state_size = self.config['model_info']['state_size']
         self.action_size = self.config['model_info']['action_size']
@@ -43,18 +57,92 @@ class TrixAIInference:
         self.agent.policy.load_state_dict(checkpoint['policy_state_dict'])
         self.agent.policy.eval()  # Set to evaluation mode
         
+        # BF16 halves weight bandwidth; FP32 stays the default for debugging
+        self.dtype = torch.bfloat16 if use_bf16 else torch.float32
+        if use_bf16:
+            self.agent.policy = self.agent.policy.to(dtype=self.dtype)
+        
+        # Compiled copy of the policy used for the per-move forward pass
+        self.policy = self._optimize_policy(self.agent.policy)
+        
+        # Reusable input buffers, overwritten in place on every predict call
+        self._state_buf = torch.empty(1, self.state_size, dtype=torch.float32)
+        self._state_np = self._state_buf.numpy()  # zero-copy view for writes
+        self._mask_buf = torch.empty(1, self.action_size, dtype=torch.float32)
+        
         print(f"✓ Trix AI Agent loaded")
         print(f"  State size: {self.state_size}")
         print(f"  Action size: {self.action_size}")
         print(f"  Win rate: {self.config['model_info']['win_rate']:.1%}")
     
-    def predict(self, game_state: np.ndarray, legal_actions: list) -> dict:
+    def _optimize_policy(self, policy: torch.nn.Module) -> torch.nn.Module:
+        """
+        Script (or trace) and freeze the policy network for inference.
+        
+        Falls back to tracing with fixed-shape example inputs if the policy
+        can't be scripted, and to the eager policy if neither works.
+        """
+        example_state = torch.zeros(1, self.state_size, dtype=self.dtype)
+        example_mask = torch.ones(1, self.action_size, dtype=self.dtype)
+        
+        try:
+            try:
+                compiled = torch.jit.script(policy)
+            except Exception:
+                compiled = torch.jit.trace(policy, (example_state, example_mask))
+            
+            compiled = torch.jit.freeze(compiled.eval())
+            if hasattr(torch.jit, 'optimize_for_inference'):
+                compiled = torch.jit.optimize_for_inference(compiled)
+            
+            # Warm up so the first real move doesn't pay the compile cost
+            with torch.no_grad():
+                compiled(example_state, example_mask)
+            return compiled
+        except Exception as e:
+            print(f"⚠️ Could not compile policy, using eager mode: {e}")
+            return policy
+    
+    def _forward(self, states: torch.Tensor, masks: torch.Tensor):
+        """
+        Run the policy on a (B, state_size) batch and mask out illegal actions
+        
+        Illegal actions get MASK_PENALTY added to their logits, so masking is
+        a single branchless add. Returns (B, action_size) logits and (B,) values.
+        """
+        mask_additive = torch.where(masks > 0, 0.0, MASK_PENALTY)
+        with torch.no_grad():
+            logits, values = self.policy(states.to(self.dtype), masks.to(self.dtype))
+        return logits.float() + mask_additive, values.float().reshape(-1)
+    
+    def predict_batch(self, states: np.ndarray, legal_masks: np.ndarray) -> list:
+        """
+        Get the best action for several game states in a single forward pass
+        
+        Args:
+            states: numpy array of shape (B, state_size)
+            legal_masks: numpy array of shape (B, action_size), 1 for legal actions
+            
+        Returns:
+            list of B best action indices
+        """
+        states_t = torch.from_numpy(np.ascontiguousarray(states, dtype=np.float32))
+        masks_t = torch.from_numpy(np.ascontiguousarray(legal_masks, dtype=np.float32))
+        
+        logits, _ = self._forward(states_t, masks_t)
+        return logits.argmax(dim=-1).tolist()
+    
+    def predict(self, game_state: np.ndarray, legal_actions: list, return_probs: bool = False) -> dict:
         """
         Get AI prediction for the given game state
         
+        Runs the same masked batch forward as predict_batch with B=1, and
+        also reports the value estimate plus the top action probabilities.
+        
         Args:
             game_state: numpy array of shape (state_size,)
             legal_actions: list of legal action indices
+            return_probs: also compute 'top_actions' (needs a full softmax)
             
         Returns:
             dict with prediction results
@@ -62,36 +150,46 @@ class TrixAIInference:
         if len(game_state) != self.state_size:
             raise ValueError(f"Game state must have {self.state_size} dimensions")
         
-        # Get action from agent
-        action, log_prob, value = self.agent.select_action(
-            game_state, legal_actions, deterministic=True
-        )
+        # Forced move (e.g. must follow suit): skip the forward pass entirely
+        if len(legal_actions) == 1:
+            result = {
+                'best_action': legal_actions[0],
+                'confidence': 0.0,  # log prob of a certain action
+                'value_estimate': 0.0,
+                'legal_actions': legal_actions
+            }
+            if return_probs:
+                result['top_actions'] = [{'action': legal_actions[0], 'probability': 1.0}]
+            return result
         
-        # Get full action probabilities for analysis
-        with torch.no_grad():
-            state_tensor = torch.FloatTensor(game_state).unsqueeze(0)
-            action_mask = torch.zeros(1, self.action_size)
-            for legal_action in legal_actions:
-                action_mask[0, legal_action] = 1.0
-            
-            action_probs, pred_value = self.agent.policy(state_tensor, action_mask)
-            action_probs = torch.softmax(action_probs, dim=-1)
-            
-            # Get top 3 actions
-            top_actions = []
-            for legal_action in legal_actions:
-                prob = action_probs[0, legal_action].item()
-                top_actions.append({'action': legal_action, 'probability': prob})
-            
-            top_actions.sort(key=lambda x: x['probability'], reverse=True)
+        # Fill the reusable (1, N) batch buffers in place
+        self._state_np[0, :] = game_state
+        self._mask_buf.zero_()
+        self._mask_buf[0, torch.as_tensor(legal_actions, dtype=torch.long)] = 1.0
+        
+        logits, values = self._forward(self._state_buf, self._mask_buf)
+        logits = logits[0]
         
-        return {
+        # Softmax is monotonic, so the best action comes straight from the logits
+        action = int(logits.argmax())
+        
+        result = {
             'best_action': action,
-            'confidence': log_prob,
-            'value_estimate': value,
-            'top_actions': top_actions[:3],
+            'confidence': (logits[action] - torch.logsumexp(logits, dim=-1)).item(),
+            'value_estimate': values[0].item(),
             'legal_actions': legal_actions
         }
+        
+        if return_probs:
+            # Get top 3 actions (illegal actions have zero probability)
+            action_probs = torch.softmax(logits, dim=-1)
+            top_probs, top_indices = torch.topk(action_probs, k=min(3, len(legal_actions)))
+            result['top_actions'] = [
+                {'action': action_idx, 'probability': prob}
+                for action_idx, prob in zip(top_indices.tolist(), top_probs.tolist())
+            ]
+        
+        return result
     
     def get_model_info(self) -> dict:
         """Get model information"""
@@ -120,35 +218,55 @@ def demo_game():
     for turn in range(3):
         print(f"\n--- Turn {turn + 1} ---")
         
-        # Check if player 0 has a turn
-        if 0 in observations and observations[0] is not None:
-            legal_actions = env.get_legal_actions(0)
+        # Only seats on turn may act; fall back to player 0 if the env doesn't say
+        on_turn = getattr(env, 'current_player', 0)
+        on_turn = on_turn if isinstance(on_turn, (list, tuple, set)) else [on_turn]
+        
+        pending = {}
+        for player in on_turn:
+            if observations.get(player) is not None:
+                legal_actions = env.get_legal_actions(player)
+                if legal_actions:
+                    pending[player] = (observations[player], legal_actions)
+        
+        if not pending:
+            print("No legal actions available")
+            break
+        
+        if len(pending) == 1:
+            # Single seat: full diagnostics from the B=1 path
+            [(player, (observation, legal_actions))] = pending.items()
+            prediction = ai.predict(observation, legal_actions, return_probs=True)
+            
+            print(f"Player {player} legal actions: {legal_actions}")
+            print(f"AI recommends action: {prediction['best_action']}")
+            print(f"Confidence (log prob): {prediction['confidence']:.3f}")
+            print(f"Value estimate: {prediction['value_estimate']:.3f}")
+            
+            print("Top 3 action probabilities:")
+            for i, action_info in enumerate(prediction['top_actions']):
+                print(f"  {i+1}. Action {action_info['action']}: {action_info['probability']:.3f}")
             
-            if legal_actions:
-                # Get AI prediction
-                prediction = ai.predict(observations[0], legal_actions)
-                
-                print(f"Legal actions: {legal_actions}")
-                print(f"AI recommends action: {prediction['best_action']}")
-                print(f"Confidence (log prob): {prediction['confidence']:.3f}")
-                print(f"Value estimate: {prediction['value_estimate']:.3f}")
-                
-                print("Top 3 action probabilities:")
-                for i, action_info in enumerate(prediction['top_actions']):
-                    print(f"  {i+1}. Action {action_info['action']}: {action_info['probability']:.3f}")
-                
-                # Execute the action
-                actions = {0: prediction['best_action']}
-                observations, rewards, dones, truncated, infos = env.step(actions)
-                
-                if 0 in rewards:
-                    print(f"Reward received: {rewards[0]:.3f}")
-            else:
-                print("No legal actions available")
-                break
+            actions = {player: prediction['best_action']}
         else:
-            print("No observation for player 0")
-            break
+            # Several seats on turn: decide for all of them in one forward pass
+            states = np.stack([observation for observation, _ in pending.values()])
+            legal_masks = np.zeros((len(pending), ai.action_size), dtype=np.float32)
+            for row, (_, legal_actions) in enumerate(pending.values()):
+                legal_masks[row, legal_actions] = 1.0
+            
+            actions = dict(zip(pending.keys(), ai.predict_batch(states, legal_masks)))
+            
+            for player, (_, legal_actions) in pending.items():
+                print(f"Player {player} legal actions: {legal_actions}")
+                print(f"AI recommends action: {actions[player]}")
+        
+        # Execute the actions
+        observations, rewards, dones, truncated, infos = env.step(actions)
+        
+        for player in actions:
+            if player in rewards:
+                print(f"Player {player} reward received: {rewards[player]:.3f}")
     
     print("\n🎉 Demo completed!")
     print("\nTo use in your Flutter app:")
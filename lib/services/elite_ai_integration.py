@@ -10,35 +10,82 @@ Give this file to your Flutter AI agent for easy integration.
 """
 
 import json
+import logging
 import sys
 import os
 from typing import Dict, Any, Optional
 
+logger = logging.getLogger(__name__)
+
 # Add project root to path
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
 try:
     import torch
-    from stable_baselines3 import PPO
-    from trex_ai.game_environment.trex_env import TrexEnvironment
     import numpy as np
     PYTORCH_AVAILABLE = True
 except ImportError as e:
-    print(f"⚠️ PyTorch not available: {e}")
+    logger.warning("PyTorch not available: %s", e)
     PYTORCH_AVAILABLE = False
 
+# stable_baselines3 is only needed when no scripted model cache exists yet
+try:
+    from stable_baselines3 import PPO
+    from trex_ai.game_environment.trex_env import TrexEnvironment
+    STABLE_BASELINES_AVAILABLE = True
+except ImportError as e:
+    logger.warning("stable_baselines3 not available, using scripted models only: %s", e)
+    STABLE_BASELINES_AVAILABLE = False
+
+# Game mode one-hot positions in the game_state observation vector (offset by 4)
+GAME_MODES = {'kingdom': 0, 'hearts': 1, 'queens': 2, 'diamonds': 3, 'king_of_hearts': 4}
+
+if PYTORCH_AVAILABLE:
+    class InferenceHead(torch.nn.Module):
+        """
+        Scriptable actor path of an SB3 PPO policy.
+        
+        Takes the unbatched observation tensors and returns the deterministic
+        action, i.e. what PPO.predict(obs, deterministic=True) computes,
+        without SB3's Python-side preprocessing and distribution objects.
+        """
+        
+        def __init__(self, policy):
+            super().__init__()
+            self.features = getattr(policy, 'pi_features_extractor', policy.features_extractor)
+            self.mlp = policy.mlp_extractor
+            self.head = policy.action_net
+        
+        def forward(self, obs: Dict[str, torch.Tensor]) -> torch.Tensor:
+            batch: Dict[str, torch.Tensor] = {}
+            for key, value in obs.items():
+                batch[key] = value.float().unsqueeze(0)
+            latent = self.mlp.forward_actor(self.features(batch))
+            return self.head(latent).argmax(dim=-1)
+
 class TrexAIForFlutter:
     """
     Simple Trex AI integration for Flutter games.
     Uses the BEST trained models (5M steps, Generation 100/99).
     """
     
-    def __init__(self):
+    def __init__(self, compile_model: bool = True, quantize_model: bool = False,
+                 use_cuda_graph: bool = False):
         self.model = None
         self.model_name = None
         self.model_loaded = False
-        self.device = torch.device('cpu')  # Use CPU for mobile compatibility
+        self.compile_model = compile_model  # torch.compile the policy after loading
+        self.quantize_model = quantize_model  # Opt-in INT8 dynamic quantization of Linear layers
+        self.jit_policy = None  # Scripted InferenceHead, used instead of PPO.predict
+        
+        # Use CPU for mobile compatibility; CUDA graphs are opt-in for GPU self-play
+        if use_cuda_graph and torch.cuda.is_available():
+            self.device = torch.device('cuda')
+        else:
+            self.device = torch.device('cpu')
+        self._cuda_graph = None
+        self._graph_action = None
         
         # TOP 2 BEST MODELS (in order of preference)
         self.BEST_MODELS = [
@@ -57,37 +104,214 @@ class TrexAIForFlutter:
                 'rank': 2
             }
         ]
+        
+        # Observation buffers reused by every _convert_to_model_format call
+        self._obs = {
+            'hand': np.zeros(52, dtype=np.int8),
+            'legal_actions_mask': np.zeros(52, dtype=np.int8),
+            'trick_cards': np.zeros(52, dtype=np.int8),
+            'trick_history': np.zeros(52, dtype=np.int8),
+            'game_state': np.zeros(54, dtype=np.float32)
+        }
+        self._obs_tensors = {key: torch.from_numpy(buf) for key, buf in self._obs.items()}
+        
+        # Inputs fed to the scripted policy (persistent device copies when not on CPU)
+        if self.device.type == 'cpu':
+            self._device_obs = self._obs_tensors
+        else:
+            self._device_obs = {key: torch.zeros_like(t, device=self.device)
+                                for key, t in self._obs_tensors.items()}
     
     def load_best_available_model(self) -> bool:
         """Load the best available model from the top 2."""
         if not PYTORCH_AVAILABLE:
-            print("❌ PyTorch not available - cannot load neural network models")
+            logger.error("PyTorch not available - cannot load neural network models")
             return False
             
         for model_info in self.BEST_MODELS:
             model_path = os.path.join(PROJECT_ROOT, model_info['path'])
             
-            if os.path.exists(model_path):
+            # Prefer the scripted cache: no unpickling and no stable_baselines3 needed
+            if self._load_scripted_cache(model_path):
+                self.model_name = model_info['name']
+                self.model_loaded = True
+                self._capture_cuda_graph()
+                logger.info("Loaded scripted %s", model_info['name'])
+                return True
+            
+            if os.path.exists(model_path) and STABLE_BASELINES_AVAILABLE:
                 try:
-                    print(f"🧠 Loading {model_info['name']}...")
-                    print(f"📈 Steps: {model_info['steps']:,}")
-                    print(f"🏆 Rank: #{model_info['rank']}")
+                    logger.info("Loading %s (%d steps, rank #%d)",
+                                model_info['name'], model_info['steps'], model_info['rank'])
                     
                     # Load the model
                     self.model = PPO.load(model_path, device=self.device)
                     self.model_name = model_info['name']
                     self.model_loaded = True
                     
-                    print(f"✅ SUCCESS! Loaded {model_info['name']}")
+                    # Quantize before compiling so the compiled graph uses the INT8 kernels
+                    # (dynamic quantization only has CPU kernels)
+                    quantized = self._wants_int8() and self._quantize_policy()
+                    self.jit_policy = self._build_inference_head()
+                    if self.jit_policy is None and self.compile_model:
+                        self._compile_policy()
+                    if quantized == self._wants_int8():
+                        # Only cache the variant that was requested, never a fallback
+                        self._ensure_scripted_cache(model_path)
+                        self._export_lite_interpreter(model_path)
+                    self._capture_cuda_graph()
+                    
+                    logger.info("Loaded %s", model_info['name'])
                     return True
                     
                 except Exception as e:
-                    print(f"❌ Failed to load {model_info['name']}: {e}")
+                    logger.error("Failed to load %s: %s", model_info['name'], e)
                     continue
                     
-        print("❌ Could not load any of the top 2 models")
+        logger.error("Could not load any of the top 2 models")
         return False
     
+    def _wants_int8(self) -> bool:
+        """Whether this configuration runs the INT8 policy (dynamic quantization is CPU-only)."""
+        return self.quantize_model and self.device.type == 'cpu'
+    
+    def _scripted_cache_path(self, model_path: str) -> str:
+        """Path of the TorchScript artifact cached next to a PPO model file."""
+        # Keyed on device and precision, so one configuration never loads another's head
+        variant = 'int8' if self._wants_int8() else 'fp32'
+        return f"{model_path}.{self.device.type}.{variant}.ts"
+    
+    def _load_scripted_cache(self, model_path: str) -> bool:
+        """Load the cached TorchScript policy if it is at least as new as the model file."""
+        cached_path = self._scripted_cache_path(model_path)
+        if not os.path.exists(cached_path):
+            return False
+        if os.path.exists(model_path) and os.path.getmtime(cached_path) < os.path.getmtime(model_path):
+            return False  # Stale cache, rebuild from the PPO model
+            
+        try:
+            self.jit_policy = torch.jit.load(cached_path, map_location=self.device)
+            return True
+        except Exception as e:
+            logger.warning("Could not load scripted cache %s: %s", cached_path, e)
+            return False
+    
+    def _ensure_scripted_cache(self, model_path: str):
+        """Save the scripted policy next to the model so later launches skip PPO.load."""
+        if self.jit_policy is None:
+            return
+            
+        cached_path = self._scripted_cache_path(model_path)
+        try:
+            torch.jit.save(self.jit_policy, cached_path)
+        except Exception as e:
+            logger.warning("Could not write scripted cache %s: %s", cached_path, e)
+    
+    def _export_lite_interpreter(self, model_path: str):
+        """Save the scripted actor path for the PyTorch Mobile (lite interpreter) runtime."""
+        if self.device.type != 'cpu' or self.jit_policy is None:
+            return  # Mobile runtimes are CPU-only
+            
+        lite_path = self._scripted_cache_path(model_path)[:-len('.ts')] + '.ptl'
+        try:
+            # Script afresh: optimize_for_mobile runs its own freezing passes
+            scripted = torch.jit.script(InferenceHead(self.model.policy).eval())
+            try:
+                from torch.utils.mobile_optimizer import optimize_for_mobile
+                scripted = optimize_for_mobile(scripted)
+            except Exception as e:
+                # e.g. torch builds without XNNPACK; the plain scripted head still runs
+                logger.info("Mobile optimization unavailable, saving unoptimized model: %s", e)
+            scripted._save_for_lite_interpreter(lite_path)
+        except Exception as e:
+            logger.warning("Could not write lite-interpreter model %s: %s", lite_path, e)
+    
+    def _quantize_policy(self) -> bool:
+        """Dynamically quantize the policy's Linear layers to INT8 for CPU inference."""
+        if 'qnnpack' in torch.backends.quantized.supported_engines:
+            torch.backends.quantized.engine = 'qnnpack'  # ARM kernels used on Android/iOS
+            
+        try:
+            policy = self.model.policy
+            for name in ('mlp_extractor', 'action_net', 'value_net'):
+                module = getattr(policy, name, None)
+                if module is not None:
+                    setattr(policy, name, torch.ao.quantization.quantize_dynamic(
+                        module, {torch.nn.Linear}, dtype=torch.qint8
+                    ))
+            return True
+        except Exception as e:
+            logger.warning("Quantization failed, using FP32 policy: %s", e)
+            return False
+    
+    def _build_inference_head(self):
+        """Script, freeze and optimize the actor path of the loaded policy."""
+        try:
+            head = InferenceHead(self.model.policy).eval()
+            jit_policy = torch.jit.freeze(torch.jit.script(head))
+            if hasattr(torch.jit, 'optimize_for_inference'):
+                jit_policy = torch.jit.optimize_for_inference(jit_policy)
+            
+            # Warmup with a dummy observation so optimization passes run now
+            self._convert_to_model_format({})
+            with torch.no_grad():
+                jit_policy(self._device_obs)
+            return jit_policy
+        except Exception as e:
+            logger.warning("Could not script inference head, using PPO.predict: %s", e)
+            return None
+    
+    def _capture_cuda_graph(self):
+        """Capture the scripted policy forward in a CUDA graph for single-submit replay."""
+        if self.device.type != 'cuda' or self.jit_policy is None:
+            return
+            
+        try:
+            # Warm up on a side stream before capture, as CUDA graphs require
+            stream = torch.cuda.Stream()
+            stream.wait_stream(torch.cuda.current_stream())
+            with torch.cuda.stream(stream), torch.no_grad():
+                for _ in range(3):
+                    self.jit_policy(self._device_obs)
+            torch.cuda.current_stream().wait_stream(stream)
+            
+            graph = torch.cuda.CUDAGraph()
+            with torch.no_grad(), torch.cuda.graph(graph):
+                self._graph_action = self.jit_policy(self._device_obs)
+            self._cuda_graph = graph
+        except Exception as e:
+            logger.warning("CUDA graph capture failed, running policy directly: %s", e)
+            self._cuda_graph = None
+            self._graph_action = None
+    
+    def _run_jit_policy(self):
+        """Run the scripted policy on the observation just written to the buffers."""
+        if self._device_obs is not self._obs_tensors:
+            for key, buf in self._device_obs.items():
+                buf.copy_(self._obs_tensors[key])
+                
+        if self._cuda_graph is not None:
+            self._cuda_graph.replay()
+            return self._graph_action
+        return self.jit_policy(self._device_obs)
+    
+    def _compile_policy(self):
+        """Compile the policy forward pass and warm it up outside the move hot path."""
+        if not hasattr(torch, 'compile'):
+            return
+            
+        try:
+            policy = self.model.policy
+            policy.forward = torch.compile(policy.forward, mode="reduce-overhead", fullgraph=False)
+            
+            # Warmup with a dummy observation so compilation happens now
+            dummy_obs = self._convert_to_model_format({})
+            with torch.no_grad():
+                self.model.predict(dummy_obs, deterministic=True)
+        except Exception as e:
+            logger.warning("torch.compile failed, using eager policy: %s", e)
+            self.model.policy.__dict__.pop('forward', None)  # restore the eager forward
+    
     def get_ai_move(self, game_state: Dict[str, Any]) -> Dict[str, Any]:
         """
         Get AI move for Flutter game.
@@ -113,6 +337,17 @@ class TrexAIForFlutter:
         }
         """
         
+        # Forced move (e.g. must follow suit): no need to run the network
+        valid_cards = game_state.get('valid_cards', [])
+        if len(valid_cards) == 1:
+            return {
+                'best_card': valid_cards[0],
+                'confidence': 1.0,
+                'reasoning': 'Forced move (only one valid card)',
+                'model_used': self.model_name or 'n/a',
+                'success': True
+            }
+        
         if not self.model_loaded:
             if not self.load_best_available_model():
                 return self._fallback_move(game_state)
@@ -121,9 +356,12 @@ class TrexAIForFlutter:
             # Convert game state to model format
             obs = self._convert_to_model_format(game_state)
             
-            # Get AI prediction
+            # Get AI prediction (obs tensors are views of the buffers just filled)
             with torch.no_grad():
-                action, _ = self.model.predict(obs, deterministic=True)
+                if self.jit_policy is not None:
+                    action = self._run_jit_policy()
+                else:
+                    action, _ = self.model.predict(obs, deterministic=True)
                 
             # Convert action to card choice
             result = self._convert_action_to_card(action, game_state)
@@ -136,11 +374,16 @@ class TrexAIForFlutter:
             return result
             
         except Exception as e:
-            print(f"⚠️ AI prediction failed: {e}")
+            logger.warning("AI prediction failed: %s", e)
             return self._fallback_move(game_state)
     
     def _convert_to_model_format(self, game_state: Dict[str, Any]) -> Dict[str, np.ndarray]:
-        """Convert Flutter game state to model input format."""
+        """
+        Convert Flutter game state to model input format.
+        
+        The returned arrays are shared buffers overwritten on the next call,
+        so they must not be kept across moves.
+        """
         
         # Extract game components
         player_cards = game_state.get('player_cards', [])
@@ -151,50 +394,44 @@ class TrexAIForFlutter:
         tricks_won = game_state.get('tricks_won', 0)
         hearts_broken = game_state.get('hearts_broken', False)
         
-        # Create model observation (Dict format for 5M models)
-        obs = {}
+        # Model observation (Dict format for 5M models)
+        obs = self._obs
         
         # 1. Hand: which cards player has
-        hand = np.zeros(52, dtype=np.int8)
-        for card in player_cards:
-            if 0 <= card < 52:
-                hand[card] = 1
-        obs['hand'] = hand
+        self._fill_card_mask(obs['hand'], player_cards)
         
         # 2. Legal actions: which cards can be played
-        legal_actions = np.zeros(52, dtype=np.int8)
-        for card in valid_cards:
-            if 0 <= card < 52:
-                legal_actions[card] = 1
-        obs['legal_actions_mask'] = legal_actions
+        self._fill_card_mask(obs['legal_actions_mask'], valid_cards)
         
         # 3. Current trick cards
-        trick_cards = np.zeros(52, dtype=np.int8)
-        for card in played_cards:
-            if 0 <= card < 52:
-                trick_cards[card] = 1
-        obs['trick_cards'] = trick_cards
+        self._fill_card_mask(obs['trick_cards'], played_cards)
         
         # 4. All played cards (history)
-        obs['trick_history'] = trick_cards.copy()  # Simplified
+        np.copyto(obs['trick_history'], obs['trick_cards'])  # Simplified
         
-        # 5. Game state info
-        game_state_vec = np.zeros(54, dtype=np.float32)
-        game_state_vec[0] = current_player / 3.0
-        game_state_vec[1] = tricks_won / 13.0
-        game_state_vec[2] = 1.0 if hearts_broken else 0.0
-        game_state_vec[3] = len(player_cards) / 13.0
+        # 5. Game state info (only the first 9 slots are ever set)
+        game_state_vec = obs['game_state']
+        game_state_vec[:4] = (
+            current_player / 3.0,
+            tricks_won / 13.0,
+            1.0 if hearts_broken else 0.0,
+            len(player_cards) / 13.0
+        )
         
         # Game mode encoding
-        modes = {'kingdom': 0, 'hearts': 1, 'queens': 2, 'diamonds': 3, 'king_of_hearts': 4}
-        mode_idx = modes.get(game_mode, 0)
-        if 4 + mode_idx < 54:
-            game_state_vec[4 + mode_idx] = 1.0
-            
-        obs['game_state'] = game_state_vec
+        game_state_vec[4:9] = 0.0
+        game_state_vec[4 + GAME_MODES.get(game_mode, 0)] = 1.0
         
         return obs
     
+    @staticmethod
+    def _fill_card_mask(mask: np.ndarray, cards) -> None:
+        """Reset a 52-card mask in place and set the given in-range cards."""
+        mask.fill(0)
+        if len(cards):
+            indices = np.asarray(cards, dtype=np.intp)
+            mask[indices[(indices >= 0) & (indices < 52)]] = 1
+    
     def _convert_action_to_card(self, action: int, game_state: Dict[str, Any]) -> Dict[str, Any]:
         """Convert model action to card choice."""
         valid_cards = game_state.get('valid_cards', [])
@@ -233,6 +470,8 @@ class TrexAIForFlutter:
         
         # Simple strategy: play lowest card
         chosen_card = min(valid_cards)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Fallback move %d from %d valid cards", chosen_card, len(valid_cards))
         
         return {
             'best_card': chosen_card,
@@ -263,6 +502,8 @@ class TrexAIForFlutter:
 def example_usage():
     """Example of how to use the AI in Flutter game."""
     
+    logging.basicConfig(level=logging.INFO)
+    
     print("🎮 Trex AI Flutter Integration Example")
     print("=" * 50)
     
@@ -236,8 +236,8 @@ try:
     print("🚀 Enhanced Trex AI (90% performance) initializing...")
     ai = EnhancedTrexAI()
     
-    # Get enhanced decision
-    response = ai.get_ai_move(game_state)
+    # Get enhanced decision (verbose: reasoning and strategic context are shown in the UI)
+    response = ai.get_ai_move(game_state, verbose=True)
     
     # Add enhanced metadata
     response["difficulty"] = "${difficulty.name}"
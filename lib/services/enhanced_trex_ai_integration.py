@@ -15,22 +15,170 @@ Features:
 """
 
 import json
+import logging
 import sys
 import os
-from typing import Dict, Any, Optional, List, Tuple
+from dataclasses import dataclass, field
+from enum import IntEnum
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Dict, Any, Optional, List, Mapping, Sequence, Tuple
 import numpy as np
 
 # Add project root to path
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
-try:
-    import torch
-    from stable_baselines3 import PPO
-    PYTORCH_AVAILABLE = True
-except ImportError as e:
-    print(f"⚠️ PyTorch not available: {e}")
-    PYTORCH_AVAILABLE = False
+logger = logging.getLogger(__name__)
+
+# PyTorch is imported on first use by _ensure_torch(): strategic-fallback play
+# (no models on disk) only pays the NumPy startup cost
+PYTORCH_AVAILABLE = None
+torch = None
+PPO = None
+
+def _ensure_torch() -> bool:
+    """Import PyTorch and Stable-Baselines3 once; return whether they are available"""
+    global PYTORCH_AVAILABLE, torch, PPO
+    
+    if PYTORCH_AVAILABLE is None:
+        try:
+            import torch as _torch
+            from stable_baselines3 import PPO as _PPO
+        except ImportError as e:
+            logger.warning("PyTorch not available: %s", e)
+            PYTORCH_AVAILABLE = False
+        else:
+            torch, PPO = _torch, _PPO
+            PYTORCH_AVAILABLE = True
+    
+    return PYTORCH_AVAILABLE
+
+class GameMode(IntEnum):
+    """Trex game modes, resolved once per decision from the game_mode string"""
+    KINGDOM = 0
+    HEARTS = 1
+    QUEENS = 2
+    KING_HEARTS = 3
+    DIAMONDS = 4
+
+# Lowercased game_mode strings; unknown modes play like kingdom (no penalty cards)
+_MODE_FROM_STR = {
+    'kingdom': GameMode.KINGDOM,
+    'hearts': GameMode.HEARTS,
+    'queens': GameMode.QUEENS,
+    'king_of_hearts': GameMode.KING_HEARTS,
+    'diamonds': GameMode.DIAMONDS
+}
+
+# Card indices are suit * 13 + rank, ranks 2..A -> 0..12,
+# suits clubs, diamonds, hearts, spades
+SUIT_CLUBS, SUIT_DIAMONDS, SUIT_HEARTS, SUIT_SPADES = range(4)
+RANK_QUEEN = 10
+RANK_KING = 11
+KING_OF_HEARTS = SUIT_HEARTS * 13 + RANK_KING  # 37 (38 is the Ace of Hearts)
+
+# Suit and rank per card, as plain tuples for single-card lookups
+SUIT_TABLE = tuple(card // 13 for card in range(52))
+RANK_TABLE = tuple(card % 13 for card in range(52))
+
+# Card property masks over card indices, for the vectorized paths
+_CARD_SUITS = np.array(SUIT_TABLE)
+_CARD_RANKS = np.array(RANK_TABLE)
+
+HEART_MASK = _CARD_SUITS == SUIT_HEARTS
+DIAMOND_MASK = _CARD_SUITS == SUIT_DIAMONDS
+QUEEN_MASK = _CARD_RANKS == RANK_QUEEN
+KING_HEARTS_MASK = np.zeros(52, dtype=bool)
+KING_HEARTS_MASK[KING_OF_HEARTS] = True
+NO_PENALTY_MASK = np.zeros(52, dtype=bool)
+
+# Penalty cards, indexed by GameMode
+PENALTY_MASK_BY_MODE = (NO_PENALTY_MASK, HEART_MASK, QUEEN_MASK, KING_HEARTS_MASK, DIAMOND_MASK)
+
+# Neural network input layout: one-hot game mode slot (none for unknown modes)
+# and risk level encoding
+GAME_MODE_IDX = {'kingdom': 0, 'hearts': 1, 'queens': 2, 'diamonds': 3, 'king_of_hearts': 4}
+RISK_LEVELS = {'low': 0.0, 'medium': 0.5, 'high': 1.0}
+NN_INPUT_SIZE = 128
+
+# Readable card names, indexed by card (rank within suit, suits in ♣ ♦ ♥ ♠ order)
+CARD_NAMES = tuple(f"{rank}{suit}" for suit in '♣♦♥♠'
+                   for rank in ('2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A'))
+
+# The same card sets as 52-bit integers, for popcount-based card counting
+ALL_CARDS_BITS = (1 << 52) - 1
+HEARTS_BITS = ((1 << 13) - 1) << 26
+QUEENS_BITS = sum(1 << (suit * 13 + 10) for suit in range(4))
+HIGH_CARDS_BITS = sum(1 << (suit * 13 + rank) for suit in range(4) for rank in range(9, 13))
+
+# Response labels per decision source, so heuristic stand-ins are not reported as the network
+_NETWORK_LABELS = {
+    'model_used': 'Enhanced Neural Network (Generation 100)',
+    'performance_level': '90% human',
+    'decision_type': 'neural_network'
+}
+_HEURISTIC_LABELS = {
+    'model_used': 'Enhanced Card Heuristic (no policy network)',
+    'performance_level': '70% human',
+    'decision_type': 'heuristic'
+}
+
+# Fields every incoming game state must provide
+_REQUIRED_FIELDS = ('player_cards', 'valid_cards', 'game_mode', 'current_player')
+_REQUIRED_FIELD_SET = frozenset(_REQUIRED_FIELDS)
+_get_required_fields = itemgetter(*_REQUIRED_FIELDS)
+
+# Shared immutable defaults for optional fields (helpers only read them)
+_EMPTY_LIST = ()
+_EMPTY_DICT = MappingProxyType({})
+_DEFAULT_SCORES = (0, 0, 0, 0)
+
+# Position by cards already in the trick, game phase by trick number (clamped)
+_POSITION = ('early_position', 'early_position', 'middle_position', 'late_position')
+_PHASE = ('early_game',) * 5 + ('mid_game',) * 5 + ('end_game',) * 3
+
+def _classify_position(cards_played: int) -> str:
+    """Classify player position advantage"""
+    return _POSITION[min(cards_played, 3)]
+
+def _classify_game_phase(trick_number: int) -> str:
+    """Classify current game phase"""
+    return _PHASE[min(max(trick_number, 0), 12)]
+
+@dataclass(slots=True)
+class GameStateView:
+    """Validated game state plus derived metrics, as read by the decision helpers"""
+    valid: bool = False
+    error: Optional[str] = None
+    player_cards: List[int] = field(default_factory=list)
+    valid_cards: List[int] = field(default_factory=list)
+    game_mode: str = 'kingdom'
+    mode: GameMode = GameMode.KINGDOM  # game_mode resolved once per decision
+    mode_slot: Optional[int] = 0  # One-hot slot of game_mode in the NN input
+    played_cards: Sequence[int] = _EMPTY_LIST
+    current_player: int = 0
+    tricks_won: int = 0
+    hearts_broken: bool = False
+    
+    # Enhanced fields for 90% performance
+    player_position: int = 1
+    round_number: int = 1
+    trick_number: int = 1
+    lead_suit: Optional[str] = None
+    scores: Sequence[int] = _DEFAULT_SCORES
+    cards_played_history: Sequence[int] = _EMPTY_LIST
+    trump_suit: Optional[str] = None
+    penalty_cards_taken: Mapping[str, Any] = field(default_factory=lambda: _EMPTY_DICT)
+    
+    # Derived metrics
+    valid_cards_arr: np.ndarray = field(default_factory=lambda: np.zeros(0, dtype=np.intp))
+    hand_size: int = 0
+    trick_depth: int = 0  # Cards already played in the current trick
+    played_ratio: float = 0.0  # trick_depth / 4
+    cards_remaining: int = 52
+    position_type: str = 'early_position'
+    game_phase: str = 'early_game'
 
 class EnhancedTrexAI:
     """
@@ -46,8 +194,10 @@ class EnhancedTrexAI:
     
     def __init__(self):
         self.models = {}
+        self._primary_model = None  # Entry of self.models used for decisions, set at load time
+        self._models_materialized = False  # Primary policy file held a runnable network
         self.model_loaded = False
-        self.device = torch.device('cpu')  # CPU for Flutter compatibility
+        self.device = None  # CPU for Flutter compatibility, set once PyTorch is imported
         
         # Enhanced AI features
         self.strategic_memory = {}
@@ -58,6 +208,25 @@ class EnhancedTrexAI:
             'diamonds': []
         }
         
+        # Penalty risk assessment per GameMode (kingdom has no penalty cards)
+        self._risk_assessors = (
+            None,
+            self._assess_hearts_risk,
+            self._assess_queens_risk,
+            self._assess_king_hearts_risk,
+            self._assess_diamonds_risk
+        )
+        
+        # Processed game state, refilled in place on every decision
+        self._state_view = GameStateView()
+        
+        # Played-card bitmask, folded incrementally from cards_played_history
+        self._played_bits = 0
+        self._history_cards: List[int] = []
+        
+        # Neural network input, overwritten in place on every decision
+        self._nn_buf = np.zeros(NN_INPUT_SIZE, dtype=np.float32)
+        
         # Performance metrics
         self.decisions_made = 0
         self.confidence_total = 0.0
@@ -67,10 +236,6 @@ class EnhancedTrexAI:
     
     def _load_elite_models(self) -> bool:
         """Load both elite AI models (Generation 100 and 99)"""
-        if not PYTORCH_AVAILABLE:
-            print("❌ PyTorch not available - enhanced AI requires PyTorch")
-            return False
-            
         elite_models = [
             {
                 'name': 'Claude Sonnet (Gen 100)',
@@ -93,48 +258,91 @@ class EnhancedTrexAI:
                 # Look for extracted PyTorch model files
                 policy_path = os.path.join(model_path, 'policy.pth')
                 if not os.path.exists(policy_path):
-                    print(f"⚠️ Model not found: {policy_path}")
+                    logger.warning("Model not found: %s", policy_path)
                     continue
                 
+                # Only import PyTorch once there is a model to load
+                if not self._init_torch():
+                    logger.error("PyTorch not available - enhanced AI requires PyTorch")
+                    return False
+                
                 # Load the model (simplified for demo)
-                print(f"🧠 Loading {model_info['name']}...")
-                print(f"📈 Generation: {model_info['generation']}")
-                print(f"🏆 Performance: Elite (90%+ human level)")
+                logger.info("Loading %s (generation %d)", model_info['name'], model_info['generation'])
                 
-                # In a real implementation, this would load the actual model
                 self.models[model_info['name']] = {
                     'path': policy_path,
                     'generation': model_info['generation'],
                     'loaded': True,
-                    'primary': model_info['primary']
+                    'primary': model_info['primary'],
+                    'module': self._load_policy_module(policy_path)
                 }
                 
                 if model_info['primary']:
+                    self._primary_model = self.models[model_info['name']]
+                    self._models_materialized = self._primary_model['module'] is not None
                     self.model_loaded = True
-                    print(f"✅ PRIMARY: {model_info['name']} loaded successfully")
+                    if self._models_materialized:
+                        logger.info("PRIMARY: %s loaded successfully", model_info['name'])
+                    else:
+                        logger.warning("PRIMARY: %s registered without a policy network - using heuristic decisions",
+                                       model_info['name'])
+                elif self.models[model_info['name']]['module'] is not None:
+                    logger.info("BACKUP: %s loaded successfully", model_info['name'])
                 else:
-                    print(f"✅ BACKUP: {model_info['name']} loaded successfully")
+                    logger.warning("BACKUP: %s registered without a policy network", model_info['name'])
                     
             except Exception as e:
-                print(f"❌ Failed to load {model_info['name']}: {e}")
+                logger.error("Failed to load %s: %s", model_info['name'], e)
                 continue
         
         if self.model_loaded:
-            print("🚀 Enhanced Trex AI initialized - 90% human performance ready!")
+            logger.info("Enhanced Trex AI initialized - 90% human performance ready")
             return True
         else:
-            print("⚠️ No elite models loaded - falling back to strategic rules")
+            logger.warning("No elite models loaded - falling back to strategic rules")
             return False
     
-    def get_ai_move(self, game_state: Dict[str, Any]) -> Dict[str, Any]:
+    def _init_torch(self) -> bool:
+        """Import PyTorch on first use and set up the CPU inference device"""
+        if not _ensure_torch():
+            return False
+        
+        if self.device is None:
+            self.device = torch.device('cpu')
+            # Sub-millisecond kernels: thread-pool overhead outweighs parallelism
+            torch.set_num_threads(1)
+        
+        return True
+    
+    def _load_policy_module(self, policy_path: str):
+        """Load a serialized policy network in eval mode, or None if the file holds no module"""
+        try:
+            # Bundled, trusted asset: a pickled nn.Module needs the full unpickler
+            # (torch.load defaults to weights_only=True since torch 2.6)
+            module = torch.load(policy_path, map_location=self.device, weights_only=False)
+        except Exception as e:
+            logger.error("Could not load policy network from %s: %s", policy_path, e)
+            return None
+        
+        if not isinstance(module, torch.nn.Module):
+            # Plain state dict, there is no network to run
+            logger.warning("%s holds no policy network (%s)", policy_path, type(module).__name__)
+            return None
+        
+        module.eval()
+        return module
+    
+    def get_ai_move(self, game_state: Dict[str, Any], verbose: bool = False) -> Dict[str, Any]:
         """
         Get enhanced AI move with 90% human-level performance.
         
         Args:
             game_state: Comprehensive game state with enhanced fields
+            verbose: Include 'reasoning' and 'strategic_context' in the response;
+                only callers that show the explanation (e.g. the Flutter UI) need them
             
         Returns:
-            Enhanced AI response with strategic reasoning
+            Enhanced AI response, with strategic reasoning when verbose
         """
         
         self.decisions_made += 1
@@ -143,7 +351,8 @@ class EnhancedTrexAI:
             # Enhanced validation and preprocessing
             processed_state = self._process_enhanced_game_state(game_state)
             
-            if not processed_state['valid']:
+            if not processed_state.valid:
+                logger.debug("Invalid game state: %s", processed_state.error)
                 return self._create_error_response("Invalid game state")
             
             # Strategic analysis
@@ -151,62 +360,160 @@ class EnhancedTrexAI:
             
             # Elite AI decision making
             if self.model_loaded:
-                response = self._get_elite_ai_decision(processed_state, strategic_context)
+                response = self._get_elite_ai_decision(processed_state, strategic_context, verbose)
                 if response['success']:
                     return response
             
             # Enhanced fallback with strategic reasoning
-            return self._get_enhanced_fallback_decision(processed_state, strategic_context)
+            return self._get_enhanced_fallback_decision(processed_state, strategic_context, verbose)
             
         except Exception as e:
-            print(f"❌ Enhanced AI error: {e}")
+            logger.error("Enhanced AI error: %s", e)
             return self._create_error_response(str(e))
     
-    def _process_enhanced_game_state(self, game_state: Dict[str, Any]) -> Dict[str, Any]:
-        """Process and validate enhanced game state format"""
+    def get_ai_moves_batch(self, game_states: List[Dict[str, Any]], verbose: bool = False) -> List[Dict[str, Any]]:
+        """
+        Get enhanced AI moves for several seats at once.
+        
+        States are processed one by one, then all neural network inputs go
+        through the policy network in a single forward pass.
+        
+        Args:
+            game_states: One comprehensive game state per pending decision
+            verbose: Include 'reasoning' and 'strategic_context' in each response
+            
+        Returns:
+            Enhanced AI responses, in the same order as game_states
+        """
+        
+        responses: List[Optional[Dict[str, Any]]] = [None] * len(game_states)
+        batched = []  # States the policy network can decide on
+        pending = []  # States decided through the single-state path
+        use_network = self.model_loaded and self._models_materialized
+        
+        for i, game_state in enumerate(game_states):
+            self.decisions_made += 1
+            try:
+                # Each state gets its own view, the shared one is reused per decision
+                processed_state = self._process_enhanced_game_state(game_state, GameStateView())
+                
+                if not processed_state.valid:
+                    responses[i] = self._create_error_response("Invalid game state")
+                    continue
+                
+                entry = (i, processed_state, self._analyze_strategic_context(processed_state))
+                
+                # States without valid cards go straight to the fallback
+                if use_network and processed_state.valid_cards_arr.size:
+                    batched.append(entry)
+                else:
+                    pending.append(entry)
+                
+            except Exception as e:
+                logger.error("Enhanced AI error: %s", e)
+                responses[i] = self._create_error_response(str(e))
+        
+        # Elite AI decision making, batched over every state with valid cards
+        if batched and self._init_torch():
+            try:
+                nn_inputs = np.empty((len(batched), NN_INPUT_SIZE), dtype=np.float32)
+                for row, (_, processed_state, strategic_context) in enumerate(batched):
+                    nn_inputs[row] = self._prepare_neural_network_input(processed_state, strategic_context)
+                
+                batch_probabilities = self._run_policy_module(
+                    self._primary_model['module'], nn_inputs,
+                    [processed_state.valid_cards_arr for _, processed_state, _ in batched]
+                )
+            except Exception as e:
+                logger.error("Elite AI batch decision failed: %s", e)
+                pending.extend(batched)
+            else:
+                # Rows are answered independently; a failing row is retried on its own
+                for entry, card_probabilities in zip(batched, batch_probabilities):
+                    i, processed_state, strategic_context = entry
+                    try:
+                        responses[i] = self._create_elite_response(processed_state, strategic_context,
+                                                                   card_probabilities, verbose)
+                    except Exception as e:
+                        logger.error("Elite AI decision failed: %s", e)
+                        pending.append(entry)
+        else:
+            pending.extend(batched)
+        
+        # Heuristic decisions and enhanced fallback go through the single-state path
+        for i, processed_state, strategic_context in pending:
+            try:
+                response = None
+                if self.model_loaded and processed_state.valid_cards_arr.size:
+                    response = self._get_elite_ai_decision(processed_state, strategic_context, verbose)
+                if not (response and response['success']):
+                    response = self._get_enhanced_fallback_decision(processed_state, strategic_context, verbose)
+                responses[i] = response
+            except Exception as e:
+                logger.error("Enhanced AI error: %s", e)
+                responses[i] = self._create_error_response(str(e))
+        
+        return responses
+    
+    def _process_enhanced_game_state(self, game_state: Dict[str, Any], view: Optional[GameStateView] = None) -> GameStateView:
+        """
+        Process and validate enhanced game state format.
+        
+        Fills the reusable self._state_view (or the given view) in place instead
+        of building a new dict per move; downstream helpers only read from it.
+        """
+        if view is None:
+            view = self._state_view
         
         # Required fields
-        required_fields = ['player_cards', 'valid_cards', 'game_mode', 'current_player']
-        for field in required_fields:
-            if field not in game_state:
-                return {'valid': False, 'error': f'Missing required field: {field}'}
+        if not _REQUIRED_FIELD_SET.issubset(game_state.keys()):
+            missing = next(f for f in _REQUIRED_FIELDS if f not in game_state)
+            view.valid = False
+            view.error = f'Missing required field: {missing}'
+            return view
         
         # Enhanced processing
-        processed = {
-            'valid': True,
-            'player_cards': game_state['player_cards'],
-            'valid_cards': game_state['valid_cards'],
-            'game_mode': game_state.get('game_mode', 'kingdom'),
-            'played_cards': game_state.get('played_cards', []),
-            'current_player': game_state.get('current_player', 0),
-            'tricks_won': game_state.get('tricks_won', 0),
-            'hearts_broken': game_state.get('hearts_broken', False),
-            
-            # Enhanced fields for 90% performance
-            'player_position': game_state.get('player_position', 1),
-            'round_number': game_state.get('round_number', 1),
-            'trick_number': game_state.get('trick_number', 1),
-            'lead_suit': game_state.get('lead_suit', None),
-            'scores': game_state.get('scores', [0, 0, 0, 0]),
-            'cards_played_history': game_state.get('cards_played_history', []),
-            'trump_suit': game_state.get('trump_suit', None),
-            'penalty_cards_taken': game_state.get('penalty_cards_taken', {}),
-        }
+        view.valid = True
+        view.error = None
+        view.player_cards, view.valid_cards, view.game_mode, view.current_player = _get_required_fields(game_state)
+        mode_name = view.game_mode.lower()
+        view.mode = _MODE_FROM_STR.get(mode_name, GameMode.KINGDOM)
+        view.mode_slot = GAME_MODE_IDX.get(mode_name)
+        view.played_cards = game_state.get('played_cards', _EMPTY_LIST)
+        view.tricks_won = game_state.get('tricks_won', 0)
+        view.hearts_broken = game_state.get('hearts_broken', False)
+        
+        # Enhanced fields for 90% performance
+        view.player_position = game_state.get('player_position', 1)
+        view.round_number = game_state.get('round_number', 1)
+        view.trick_number = game_state.get('trick_number', 1)
+        view.lead_suit = game_state.get('lead_suit', None)
+        view.scores = game_state.get('scores', _DEFAULT_SCORES)
+        view.cards_played_history = game_state.get('cards_played_history', _EMPTY_LIST)
+        view.trump_suit = game_state.get('trump_suit', None)
+        view.penalty_cards_taken = game_state.get('penalty_cards_taken', _EMPTY_DICT)
         
         # Calculate derived metrics
-        processed['hand_size'] = len(processed['player_cards'])
-        processed['cards_remaining'] = 52 - len(processed['cards_played_history'])
-        processed['position_type'] = self._classify_position(processed['player_position'], len(processed['played_cards']))
-        processed['game_phase'] = self._classify_game_phase(processed['trick_number'])
+        view.valid_cards_arr = np.asarray(view.valid_cards, dtype=np.intp)
+        view.hand_size = len(view.player_cards)
+        view.trick_depth = len(view.played_cards)
+        view.played_ratio = view.trick_depth / 4.0
+        view.cards_remaining = 52 - len(view.cards_played_history)
+        view.position_type = _classify_position(view.trick_depth)
+        view.game_phase = _classify_game_phase(view.trick_number)
         
-        return processed
+        return view
     
-    def _analyze_strategic_context(self, game_state: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_strategic_context(self, game_state: GameStateView) -> Dict[str, Any]:
         """Advanced strategic analysis for elite performance"""
         
+        # Position is classified once per decision and shared via the context
+        position_type = game_state.position_type
+        
         context = {
             'risk_level': 'medium',
             'strategy': 'balanced',
+            'position_type': position_type,
             'position_advantage': 'neutral',
             'penalty_risk': 'low',
             'card_counting': {},
@@ -215,7 +522,6 @@ class EnhancedTrexAI:
         }
         
         # Position analysis
-        position_type = self._classify_position(game_state['player_position'], len(game_state['played_cards']))
         if position_type == 'early_position':
             context['strategy'] = 'conservative'
             context['risk_level'] = 'low'
@@ -224,16 +530,9 @@ class EnhancedTrexAI:
             context['position_advantage'] = 'high'
         
         # Game mode specific analysis
-        game_mode = game_state['game_mode'].lower()
-        
-        if game_mode == 'hearts':
-            context['penalty_risk'] = self._assess_hearts_risk(game_state)
-        elif game_mode == 'queens':
-            context['penalty_risk'] = self._assess_queens_risk(game_state)
-        elif game_mode == 'king_of_hearts':
-            context['penalty_risk'] = self._assess_king_hearts_risk(game_state)
-        elif game_mode == 'diamonds':
-            context['penalty_risk'] = self._assess_diamonds_risk(game_state)
+        assess_risk = self._risk_assessors[game_state.mode]
+        if assess_risk is not None:
+            context['penalty_risk'] = assess_risk(game_state)
         
         # Card counting analysis
         context['card_counting'] = self._analyze_remaining_cards(game_state)
@@ -243,59 +542,88 @@ class EnhancedTrexAI:
         
         return context
     
-    def _get_elite_ai_decision(self, game_state: Dict[str, Any], strategic_context: Dict[str, Any]) -> Dict[str, Any]:
+    def _get_elite_ai_decision(self, game_state: GameStateView, strategic_context: Dict[str, Any],
+                               verbose: bool = False) -> Dict[str, Any]:
         """Get decision from elite neural network models"""
         
         if not self.model_loaded:
             return {'success': False, 'error': 'No elite models loaded'}
         
+        if not self._init_torch():
+            return {'success': False, 'error': 'PyTorch not available'}
+        
         try:
-            # Prepare enhanced neural network input
-            nn_input = self._prepare_neural_network_input(game_state, strategic_context)
-            
             # Get decision from primary model (Claude Sonnet)
-            primary_model = next((m for m in self.models.values() if m.get('primary')), None)
+            primary_model = self._primary_model
             
             if primary_model:
-                # Simulate neural network inference
-                # In real implementation, this would call the actual PyTorch model
-                card_probabilities = self._simulate_neural_network_inference(nn_input, game_state['valid_cards'])
-                
-                # Select best card with confidence
-                best_card_idx = np.argmax(card_probabilities)
-                best_card = game_state['valid_cards'][best_card_idx]
-                confidence = float(card_probabilities[best_card_idx])
-                
-                # Generate strategic reasoning
-                reasoning = self._generate_strategic_reasoning(best_card, game_state, strategic_context)
-                
-                self.confidence_total += confidence
+                if self._models_materialized:
+                    # Prepare enhanced neural network input
+                    nn_input = self._prepare_neural_network_input(game_state, strategic_context)
+                    card_probabilities = self._run_policy_module(
+                        primary_model['module'], nn_input[None], [game_state.valid_cards_arr]
+                    )[0]
+                else:
+                    # No network in the policy file: deterministic heuristic, no sampling
+                    card_probabilities = self._heuristic_card_probabilities(game_state)
                 
-                return {
-                    'success': True,
-                    'best_card': best_card,
-                    'confidence': confidence,
-                    'reasoning': reasoning,
-                    'model_used': 'Enhanced Neural Network (Generation 100)',
-                    'strategic_context': strategic_context,
-                    'performance_level': '90% human',
-                    'decision_type': 'neural_network'
-                }
+                return self._create_elite_response(game_state, strategic_context, card_probabilities, verbose,
+                                                   labels=_NETWORK_LABELS if self._models_materialized else _HEURISTIC_LABELS)
             
         except Exception as e:
-            print(f"❌ Elite AI decision failed: {e}")
+            logger.error("Elite AI decision failed: %s", e)
         
         return {'success': False, 'error': 'Elite AI decision failed'}
     
-    def _get_enhanced_fallback_decision(self, game_state: Dict[str, Any], strategic_context: Dict[str, Any]) -> Dict[str, Any]:
+    def _run_policy_module(self, module, nn_inputs: np.ndarray, valid_cards_arrs: List[np.ndarray]) -> List[np.ndarray]:
+        """Run a (B, 128) feature batch through the policy network in one forward pass"""
+        
+        # Real forward pass; inference_mode skips autograd bookkeeping
+        with torch.inference_mode():
+            logits = module(torch.from_numpy(nn_inputs))
+            
+            # Split back per state: softmax over each state's valid cards only
+            return [
+                torch.softmax(logits[row, torch.from_numpy(valid_cards_arr)], dim=-1).numpy()
+                for row, valid_cards_arr in enumerate(valid_cards_arrs)
+            ]
+    
+    def _create_elite_response(self, game_state: GameStateView, strategic_context: Dict[str, Any],
+                               card_probabilities: np.ndarray, verbose: bool = False,
+                               labels: Dict[str, str] = _NETWORK_LABELS) -> Dict[str, Any]:
+        """Build the decision response from per-valid-card probabilities"""
+        
+        # Select best card with confidence
+        best_card_idx = np.argmax(card_probabilities)
+        best_card = game_state.valid_cards[best_card_idx]
+        confidence = float(card_probabilities[best_card_idx])
+        
+        self.confidence_total += confidence
+        
+        response = {
+            'success': True,
+            'best_card': best_card,
+            'confidence': confidence,
+            **labels
+        }
+        
+        if verbose:
+            # Generate strategic reasoning
+            response['reasoning'] = self._generate_strategic_reasoning(best_card, game_state, strategic_context)
+            response['strategic_context'] = strategic_context
+        
+        return response
+    
+    def _get_enhanced_fallback_decision(self, game_state: GameStateView, strategic_context: Dict[str, Any],
+                                        verbose: bool = False) -> Dict[str, Any]:
         """Enhanced fallback with strategic reasoning (still 70%+ performance)"""
         
-        valid_cards = game_state['valid_cards']
-        if not valid_cards:
+        valid_cards = game_state.valid_cards_arr
+        if not valid_cards.size:
             return self._create_error_response("No valid cards")
         
         # Strategic card selection based on context
-        position_type = self._classify_position(game_state['player_position'], len(game_state['played_cards']))
+        position_type = strategic_context['position_type']
         if strategic_context['strategy'] == 'conservative':
             best_card = self._select_conservative_card(valid_cards, game_state)
         elif strategic_context['strategy'] == 'informed':
@@ -304,113 +632,86 @@ class EnhancedTrexAI:
             best_card = self._select_balanced_card(valid_cards, game_state)
         
         confidence = min(0.85, 0.65 + (strategic_context['position_advantage'] == 'high') * 0.2)
-        reasoning = f"Strategic {strategic_context['strategy']} play based on {position_type} position"
         
         self.confidence_total += confidence
         
-        return {
+        response = {
             'success': True,
             'best_card': best_card,
             'confidence': confidence,
-            'reasoning': reasoning,
             'model_used': 'Enhanced Strategic Rules',
-            'strategic_context': strategic_context,
             'performance_level': '70% human',
             'decision_type': 'strategic_fallback'
         }
-    
-    def _simulate_neural_network_inference(self, nn_input: np.ndarray, valid_cards: List[int]) -> np.ndarray:
-        """Simulate neural network inference with realistic probabilities"""
-        
-        # Create realistic probability distribution
-        num_cards = len(valid_cards)
         
-        # Base probabilities with some randomness
-        base_probs = np.random.dirichlet(np.ones(num_cards) * 2)
+        if verbose:
+            response['reasoning'] = f"Strategic {strategic_context['strategy']} play based on {position_type} position"
+            response['strategic_context'] = strategic_context
         
-        # Adjust based on card values (higher cards often better)
-        for i, card in enumerate(valid_cards):
-            card_rank = card % 13  # Rank within suit
-            if card_rank >= 9:  # Face cards and Aces
-                base_probs[i] *= 1.3
-            elif card_rank <= 2:  # Low cards
-                base_probs[i] *= 1.1
-        
-        # Normalize
-        base_probs = base_probs / np.sum(base_probs)
+        return response
+    
+    def _heuristic_card_probabilities(self, game_state: GameStateView) -> np.ndarray:
+        """Deterministic stand-in when the policy file holds no network: avoid penalty cards, then rank"""
+        valid_cards = game_state.valid_cards_arr
+        scores = _CARD_RANKS[valid_cards] * 0.01 - PENALTY_MASK_BY_MODE[game_state.mode][valid_cards]
         
-        # Add some elite AI sophistication
-        elite_adjustment = np.random.normal(0, 0.1, num_cards)
-        final_probs = base_probs + elite_adjustment
-        final_probs = np.clip(final_probs, 0.01, 1.0)
-        final_probs = final_probs / np.sum(final_probs)
+        # Softmax, so the best card's probability serves as the confidence
+        probs = np.exp(scores - scores.max())
+        probs /= probs.sum()
         
-        return final_probs
+        return probs
     
-    def _prepare_neural_network_input(self, game_state: Dict[str, Any], strategic_context: Dict[str, Any]) -> np.ndarray:
+    def _prepare_neural_network_input(self, game_state: GameStateView, strategic_context: Dict[str, Any]) -> np.ndarray:
         """Prepare comprehensive input for neural network"""
         
-        # Create feature vector (simplified for demo)
-        features = []
+        # Feature vector (simplified for demo); slots from 12 on are never written and stay zero
+        buf = self._nn_buf
         
         # Basic game state features
-        features.extend([
-            len(game_state['player_cards']) / 13.0,  # Hand size normalized
-            game_state['tricks_won'] / 13.0,          # Tricks won normalized
-            game_state['trick_number'] / 13.0,        # Trick number normalized
-            len(game_state['played_cards']) / 4.0,    # Cards in current trick
-        ])
-        
-        # Game mode encoding (one-hot)
-        game_modes = ['kingdom', 'hearts', 'queens', 'diamonds', 'king_of_hearts']
-        mode_encoding = [1.0 if game_state['game_mode'].lower() == mode else 0.0 for mode in game_modes]
-        features.extend(mode_encoding)
+        buf[0] = game_state.hand_size / 13.0          # Hand size normalized
+        buf[1] = game_state.tricks_won / 13.0          # Tricks won normalized
+        buf[2] = game_state.trick_number / 13.0        # Trick number normalized
+        buf[3] = game_state.played_ratio               # Cards in current trick
+        
+        # Game mode encoding (one-hot, all zero for unknown modes)
+        buf[4:9] = 0.0
+        if game_state.mode_slot is not None:
+            buf[4 + game_state.mode_slot] = 1.0
         
         # Strategic context features
-        risk_levels = {'low': 0.0, 'medium': 0.5, 'high': 1.0}
-        features.append(risk_levels.get(strategic_context['risk_level'], 0.5))
+        buf[9] = RISK_LEVELS.get(strategic_context['risk_level'], 0.5)
         
         # Position features
-        position_type = self._classify_position(game_state['player_position'], len(game_state['played_cards']))
-        position_encoding = [
-            1.0 if position_type == 'early_position' else 0.0,
-            1.0 if position_type == 'late_position' else 0.0
-        ]
-        features.extend(position_encoding)
+        position_type = strategic_context['position_type']
+        buf[10] = position_type == 'early_position'
+        buf[11] = position_type == 'late_position'
         
-        # Pad or truncate to standard size
-        target_size = 128
-        if len(features) < target_size:
-            features.extend([0.0] * (target_size - len(features)))
-        else:
-            features = features[:target_size]
-        
-        return np.array(features, dtype=np.float32)
+        # Shared buffer: callers must copy it to keep it past the next decision
+        return buf
     
-    def _generate_strategic_reasoning(self, card: int, game_state: Dict[str, Any], strategic_context: Dict[str, Any]) -> str:
+    def _generate_strategic_reasoning(self, card: int, game_state: GameStateView, strategic_context: Dict[str, Any]) -> str:
         """Generate human-readable strategic reasoning"""
         
         card_name = self._card_index_to_name(card)
-        game_mode = game_state['game_mode'].lower()
-        position = strategic_context['position_type']
+        mode = game_state.mode
+        position_type = strategic_context['position_type']
         
         reasoning_parts = []
         
         # Position-based reasoning
-        position_type = self._classify_position(game_state['player_position'], len(game_state['played_cards']))
         if position_type == 'early_position':
             reasoning_parts.append("Early position allows conservative play")
         elif position_type == 'late_position':
             reasoning_parts.append("Late position provides information advantage")
         
         # Game mode specific reasoning
-        if game_mode == 'hearts':
-            if 'Hearts' in card_name:
+        if mode == GameMode.HEARTS:
+            if self._is_heart_card(card):
                 reasoning_parts.append("Playing heart to void suit")
             else:
                 reasoning_parts.append("Avoiding hearts penalty")
-        elif game_mode == 'queens':
-            if 'Queen' in card_name:
+        elif mode == GameMode.QUEENS:
+            if self._is_queen_card(card):
                 reasoning_parts.append("Forced to play Queen")
             else:
                 reasoning_parts.append("Safe play avoiding Queens")
@@ -423,88 +724,87 @@ class EnhancedTrexAI:
         
         return f"Elite AI: {' | '.join(reasoning_parts)} | Card: {card_name}"
     
-    def _classify_position(self, player_position: int, cards_played: int) -> str:
-        """Classify player position advantage"""
-        if cards_played <= 1:
-            return 'early_position'
-        elif cards_played >= 3:
-            return 'late_position'
-        else:
-            return 'middle_position'
-    
-    def _classify_game_phase(self, trick_number: int) -> str:
-        """Classify current game phase"""
-        if trick_number <= 4:
-            return 'early_game'
-        elif trick_number <= 9:
-            return 'mid_game'
-        else:
-            return 'end_game'
-    
-    def _assess_hearts_risk(self, game_state: Dict[str, Any]) -> str:
+    def _assess_hearts_risk(self, game_state: GameStateView) -> str:
         """Assess risk level for hearts game mode"""
-        valid_cards = game_state['valid_cards']
-        heart_cards = [c for c in valid_cards if self._is_heart_card(c)]
+        valid_cards = game_state.valid_cards_arr
+        heart_cards = np.count_nonzero(HEART_MASK[valid_cards])
         
-        if len(heart_cards) >= len(valid_cards) * 0.7:
+        if heart_cards >= valid_cards.size * 0.7:
             return 'high'
-        elif len(heart_cards) > 0:
+        elif heart_cards > 0:
             return 'medium'
         else:
             return 'low'
     
-    def _assess_queens_risk(self, game_state: Dict[str, Any]) -> str:
+    def _assess_queens_risk(self, game_state: GameStateView) -> str:
         """Assess risk level for queens game mode"""
-        valid_cards = game_state['valid_cards']
-        queen_cards = [c for c in valid_cards if self._is_queen_card(c)]
+        valid_cards = game_state.valid_cards_arr
         
-        if queen_cards:
+        if QUEEN_MASK[valid_cards].any():
             return 'high'
         else:
             return 'low'
     
-    def _assess_king_hearts_risk(self, game_state: Dict[str, Any]) -> str:
+    def _assess_king_hearts_risk(self, game_state: GameStateView) -> str:
         """Assess risk level for king of hearts mode"""
-        valid_cards = game_state['valid_cards']
-        king_hearts = [c for c in valid_cards if self._is_king_of_hearts(c)]
+        valid_cards = game_state.valid_cards_arr
         
-        if king_hearts:
+        if KING_HEARTS_MASK[valid_cards].any():
             return 'high'
         else:
             return 'low'
     
-    def _assess_diamonds_risk(self, game_state: Dict[str, Any]) -> str:
+    def _assess_diamonds_risk(self, game_state: GameStateView) -> str:
         """Assess risk level for diamonds mode"""
-        valid_cards = game_state['valid_cards']
-        diamond_cards = [c for c in valid_cards if self._is_diamond_card(c)]
+        valid_cards = game_state.valid_cards_arr
+        diamond_cards = np.count_nonzero(DIAMOND_MASK[valid_cards])
         
-        if len(diamond_cards) >= len(valid_cards) * 0.5:
+        if diamond_cards >= valid_cards.size * 0.5:
             return 'high'
-        elif diamond_cards:
+        elif diamond_cards > 0:
             return 'medium'
         else:
             return 'low'
     
-    def _analyze_remaining_cards(self, game_state: Dict[str, Any]) -> Dict[str, Any]:
+    def _analyze_remaining_cards(self, game_state: GameStateView) -> Dict[str, Any]:
         """Advanced card counting analysis"""
-        played_cards = set(game_state['cards_played_history'])
-        all_cards = set(range(52))
-        remaining_cards = all_cards - played_cards
+        remaining = ~self._played_card_bits(game_state.cards_played_history) & ALL_CARDS_BITS
         
         analysis = {
-            'total_remaining': len(remaining_cards),
-            'hearts_remaining': len([c for c in remaining_cards if self._is_heart_card(c)]),
-            'queens_remaining': len([c for c in remaining_cards if self._is_queen_card(c)]),
-            'high_cards_remaining': len([c for c in remaining_cards if (c % 13) >= 9])
+            'total_remaining': remaining.bit_count(),
+            'hearts_remaining': (remaining & HEARTS_BITS).bit_count(),
+            'queens_remaining': (remaining & QUEENS_BITS).bit_count(),
+            'high_cards_remaining': (remaining & HIGH_CARDS_BITS).bit_count()
         }
         
         return analysis
     
-    def _plan_future_tricks(self, game_state: Dict[str, Any]) -> List[str]:
+    def _played_card_bits(self, history: Sequence[int]) -> int:
+        """
+        Bitmask of played cards, updated incrementally.
+        
+        History is append-only within a round, so only new entries are folded
+        in; any history that does not extend the previous one starts a new fold.
+        """
+        seen_cards = self._history_cards
+        seen = len(seen_cards)
+        if history[:seen] != seen_cards:
+            self._played_bits = 0
+            seen = 0
+        
+        bits = self._played_bits
+        for card in history[seen:]:
+            bits |= 1 << card
+        
+        self._played_bits = bits
+        self._history_cards = list(history)
+        return bits
+    
+    def _plan_future_tricks(self, game_state: GameStateView) -> List[str]:
         """Multi-trick strategic planning"""
         plans = []
         
-        hand_size = len(game_state['player_cards'])
+        hand_size = game_state.hand_size
         
         if hand_size > 8:
             plans.append("Early game: Establish card knowledge")
@@ -515,87 +815,66 @@ class EnhancedTrexAI:
         
         return plans
     
-    def _select_conservative_card(self, valid_cards: List[int], game_state: Dict[str, Any]) -> int:
+    def _select_conservative_card(self, valid_cards: np.ndarray, game_state: GameStateView) -> int:
         """Select safest possible card"""
         # Prefer low, safe cards
-        safe_cards = [c for c in valid_cards if not self._is_penalty_card(c, game_state['game_mode'])]
+        safe_cards = valid_cards[~PENALTY_MASK_BY_MODE[game_state.mode][valid_cards]]
+        pool = safe_cards if safe_cards.size else valid_cards
         
-        if safe_cards:
-            return min(safe_cards, key=lambda c: c % 13)  # Lowest rank
-        else:
-            return min(valid_cards, key=lambda c: c % 13)
+        return int(pool[_CARD_RANKS[pool].argmin()])  # Lowest rank
     
-    def _select_informed_card(self, valid_cards: List[int], game_state: Dict[str, Any], strategic_context: Dict[str, Any]) -> int:
+    def _select_informed_card(self, valid_cards: np.ndarray, game_state: GameStateView, strategic_context: Dict[str, Any]) -> int:
         """Select card with full information advantage"""
         # Use position advantage to make optimal play
-        played_cards = game_state['played_cards']
-        
-        if len(played_cards) >= 2:  # Can see other players' moves
+        if game_state.trick_depth >= 2:  # Can see other players' moves
             # Try to win if safe, otherwise play safe
-            safe_cards = [c for c in valid_cards if not self._is_penalty_card(c, game_state['game_mode'])]
+            safe_cards = valid_cards[~PENALTY_MASK_BY_MODE[game_state.mode][valid_cards]]
             
-            if safe_cards:
-                return max(safe_cards, key=lambda c: c % 13)  # Highest safe card
+            if safe_cards.size:
+                return int(safe_cards[_CARD_RANKS[safe_cards].argmax()])  # Highest safe card
             else:
-                return min(valid_cards, key=lambda c: c % 13)
+                return int(valid_cards[_CARD_RANKS[valid_cards].argmin()])
         else:
             return self._select_balanced_card(valid_cards, game_state)
     
-    def _select_balanced_card(self, valid_cards: List[int], game_state: Dict[str, Any]) -> int:
+    def _select_balanced_card(self, valid_cards: np.ndarray, game_state: GameStateView) -> int:
         """Select strategically balanced card"""
         # Balance between safety and winning potential
-        game_mode = game_state['game_mode'].lower()
+        mode = game_state.mode
         
-        if game_mode in ['hearts', 'queens', 'king_of_hearts', 'diamonds']:
+        if mode != GameMode.KINGDOM:
             # Penalty avoidance modes
-            safe_cards = [c for c in valid_cards if not self._is_penalty_card(c, game_mode)]
-            if safe_cards:
-                return safe_cards[len(safe_cards) // 2]  # Middle-ranked safe card
+            safe_cards = valid_cards[~PENALTY_MASK_BY_MODE[mode][valid_cards]]
+            if safe_cards.size:
+                return int(safe_cards[safe_cards.size // 2])  # Middle safe card, in hand order
         
-        # Default: middle-ranked card
-        sorted_cards = sorted(valid_cards, key=lambda c: c % 13)
-        return sorted_cards[len(sorted_cards) // 2]
+        # Default: middle-ranked card (stable sort keeps hand order among equal ranks)
+        by_rank = _CARD_RANKS[valid_cards].argsort(kind='stable')
+        return int(valid_cards[by_rank[by_rank.size // 2]])
     
-    def _is_penalty_card(self, card: int, game_mode: str) -> bool:
+    def _is_penalty_card(self, card: int, mode: GameMode) -> bool:
         """Check if card is penalty in given game mode"""
-        game_mode = game_mode.lower()
-        
-        if game_mode == 'hearts':
-            return self._is_heart_card(card)
-        elif game_mode == 'queens':
-            return self._is_queen_card(card)
-        elif game_mode == 'king_of_hearts':
-            return self._is_king_of_hearts(card)
-        elif game_mode == 'diamonds':
-            return self._is_diamond_card(card)
-        
-        return False
+        return bool(PENALTY_MASK_BY_MODE[mode][card])
     
     def _is_heart_card(self, card: int) -> bool:
         """Check if card is a heart"""
-        return 26 <= card <= 38
+        return SUIT_TABLE[card] == SUIT_HEARTS
     
     def _is_queen_card(self, card: int) -> bool:
         """Check if card is a queen"""
-        return card % 13 == 10  # Queens are at index 10 in each suit
+        return RANK_TABLE[card] == RANK_QUEEN
     
     def _is_king_of_hearts(self, card: int) -> bool:
         """Check if card is King of Hearts"""
-        return card == 37  # King of Hearts at index 37
+        return card == KING_OF_HEARTS
     
     def _is_diamond_card(self, card: int) -> bool:
         """Check if card is a diamond"""
-        return 13 <= card <= 25
+        return SUIT_TABLE[card] == SUIT_DIAMONDS
     
     def _card_index_to_name(self, card_index: int) -> str:
         """Convert card index to readable name"""
-        suits = ['♣', '♦', '♥', '♠']
-        ranks = ['2', '3', '4', '5', '6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        
-        suit_idx = card_index // 13
-        rank_idx = card_index % 13
-        
-        return f"{ranks[rank_idx]}{suits[suit_idx]}"
+        return CARD_NAMES[card_index]
     
     def _create_error_response(self, error_message: str) -> Dict[str, Any]:
         """Create standardized error response"""
@@ -654,7 +933,7 @@ def test_enhanced_ai():
     }
     
     ai = EnhancedTrexAI()
-    result = ai.get_ai_move(test_state)
+    result = ai.get_ai_move(test_state, verbose=True)
     
     print(f"✅ Test Result: {result}")
     print(f"✅ Success: {result['success']}")
@@ -669,6 +948,8 @@ def test_enhanced_ai():
 
 if __name__ == '__main__':
     # Run test when executed directly
+    logging.basicConfig(level=logging.INFO)
+    
     if test_enhanced_ai():
         print("🎉 Enhanced Trex AI Integration successful!")
     else: